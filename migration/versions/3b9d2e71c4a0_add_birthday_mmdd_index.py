@@ -0,0 +1,38 @@
+"""add birthday mmdd index
+
+Revision ID: 3b9d2e71c4a0
+Revises: f842bed03343
+Create Date: 2026-10-15 10:12:31.402117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3b9d2e71c4a0"
+down_revision: Union[str, Sequence[str], None] = "f842bed03343"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_contacts_birthday_mmdd",
+        "contacts",
+        [
+            sa.text(
+                "(EXTRACT(day FROM birthday) + EXTRACT(month FROM birthday) * 100)"
+            )
+        ],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_birthday_mmdd", table_name="contacts")
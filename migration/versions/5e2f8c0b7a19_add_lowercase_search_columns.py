@@ -0,0 +1,56 @@
+"""add lowercase search columns
+
+Revision ID: 5e2f8c0b7a19
+Revises: d17a5b3e8f20
+Create Date: 2026-10-15 15:27:44.118206
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e2f8c0b7a19"
+down_revision: Union[str, Sequence[str], None] = "d17a5b3e8f20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LOWER_COLUMNS = ("first_name", "last_name", "email")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A single ALTER TABLE so the stored columns cost one table rewrite.
+    op.execute(
+        "ALTER TABLE contacts "
+        + ", ".join(
+            f"ADD COLUMN {column}_lower VARCHAR "
+            f"GENERATED ALWAYS AS (lower({column})) STORED NOT NULL"
+            for column in LOWER_COLUMNS
+        )
+    )
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        for column in LOWER_COLUMNS:
+            op.create_index(
+                f"ix_contacts_{column}_lower",
+                "contacts",
+                [f"{column}_lower"],
+                unique=False,
+                postgresql_ops={f"{column}_lower": "text_pattern_ops"},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in reversed(LOWER_COLUMNS):
+        op.drop_index(f"ix_contacts_{column}_lower", table_name="contacts")
+    op.execute(
+        "ALTER TABLE contacts "
+        + ", ".join(f"DROP COLUMN {column}_lower" for column in LOWER_COLUMNS)
+    )
@@ -0,0 +1,55 @@
+"""add trigram search indexes
+
+Revision ID: 9c4e1a6f2d85
+Revises: 3b9d2e71c4a0
+Create Date: 2026-10-15 10:41:07.913554
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c4e1a6f2d85"
+down_revision: Union[str, Sequence[str], None] = "3b9d2e71c4a0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRGM_COLUMNS = ("first_name", "last_name", "email")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        for column in TRGM_COLUMNS:
+            op.create_index(
+                f"ix_contacts_{column}_trgm",
+                "contacts",
+                [column],
+                unique=False,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+                postgresql_concurrently=True,
+            )
+
+    # Plain B-tree indexes cannot serve leading-wildcard ILIKE.
+    op.drop_index(op.f("ix_contacts_first_name"), table_name="contacts")
+    op.drop_index(op.f("ix_contacts_last_name"), table_name="contacts")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        op.f("ix_contacts_last_name"), "contacts", ["last_name"], unique=False
+    )
+    op.create_index(
+        op.f("ix_contacts_first_name"), "contacts", ["first_name"], unique=False
+    )
+    for column in reversed(TRGM_COLUMNS):
+        op.drop_index(f"ix_contacts_{column}_trgm", table_name="contacts")
@@ -0,0 +1,48 @@
+"""add combined search index
+
+Revision ID: d17a5b3e8f20
+Revises: 9c4e1a6f2d85
+Create Date: 2026-10-15 11:05:52.270391
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d17a5b3e8f20"
+down_revision: Union[str, Sequence[str], None] = "9c4e1a6f2d85"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRGM_COLUMNS = ("first_name", "last_name", "email")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_contacts_search_trgm ON contacts "
+            "USING gin ((first_name || ' ' || last_name || ' ' || email) gin_trgm_ops)"
+        )
+
+    # Superseded by the combined index above.
+    for column in TRGM_COLUMNS:
+        op.drop_index(f"ix_contacts_{column}_trgm", table_name="contacts")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in TRGM_COLUMNS:
+        op.create_index(
+            f"ix_contacts_{column}_trgm",
+            "contacts",
+            [column],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+    op.drop_index("ix_contacts_search_trgm", table_name="contacts")
@@ -1,17 +1,93 @@
-from sqlalchemy.engine import create_engine
-from sqlalchemy.orm import sessionmaker
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session as SyncSession, raiseload
 
 from settings import settings
 
 
-engine = create_engine(settings.database_url, echo=True)
-Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+logger = logging.getLogger(__name__)
+
+engine = create_async_engine(
+    settings.async_database_url,
+    echo=settings.sql_echo,
+    echo_pool=False,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=True,
+    query_cache_size=settings.query_cache_size,
+    connect_args={
+        "server_settings": {
+            "pg_trgm.word_similarity_threshold": str(
+                settings.search_similarity_threshold
+            )
+        }
+    },
+)
+
+
+class RaiseloadSession(SyncSession):
+    """Session that refuses implicit lazy loads of relationships.
+
+    Every ORM SELECT gets ``raiseload("*")``, so touching an unloaded
+    relationship raises instead of silently issuing one query per row.
+    Routes opt into eager loading explicitly, e.g. with ``selectinload``.
+    """
+
+
+@event.listens_for(RaiseloadSession, "do_orm_execute")
+def _default_raiseload(orm_execute_state):
+    if (
+        orm_execute_state.is_select
+        and not orm_execute_state.is_column_load
+        and not orm_execute_state.is_relationship_load
+    ):
+        orm_execute_state.statement = orm_execute_state.statement.options(
+            raiseload("*")
+        )
+
+
+Session = async_sessionmaker(
+    bind=engine,
+    sync_session_class=RaiseloadSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _log_slow_query(conn, cursor, statement, parameters, context, executemany):
+    """Log statements slower than ``settings.slow_query_ms``."""
+    elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+    if elapsed_ms >= settings.slow_query_ms:
+        logger.warning("Slow query (%.1f ms): %s", elapsed_ms, statement)
+
+
+async def get_db():
+    """Database session dependency for read routes.
+
+    Request-scoped, so the session stays open while a streamed body is sent.
+    """
+    async with Session() as db:
+        yield db
+
 
+async def get_tx():
+    """Transactional session dependency for write routes.
 
-def get_db():
-    """Database session dependency for FastAPI routes."""
-    db = Session()
-    try:
+    The request runs in a single transaction: it is committed when the
+    route returns and rolled back if the route raises. Use it with
+    ``Depends(get_tx, scope="function")`` so the commit happens before the
+    response is sent.
+    """
+    async with Session() as db, db.begin():
         yield db
-    finally:
-        db.close()
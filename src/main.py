@@ -5,43 +5,301 @@ This module provides endpoints for CRUD operations on contacts,
 searching capabilities, and birthday tracking functionality.
 """
 
+import logging
+import time
+from calendar import isleap
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import Response, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import (
+    Delete,
+    Select,
+    Update,
+    delete,
+    event,
+    func,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, timedelta
 from typing import List
 
-from connection import get_db
-from models import Contact
+from connection import RaiseloadSession, Session, engine, get_db, get_tx
+from models import Contact, birthday_mmdd, search_text
 from schemas import ContactResponse, ContactBase, ContactUpdate
 
-app = FastAPI(
-    title="ContactHub API",
-    description="REST API for managing personal and business contacts with search and birthday tracking",
-    version="1.0.0",
-)
+logger = logging.getLogger(__name__)
+
+STREAM_BATCH_SIZE = 100
+RESPONSE_FIELDS = tuple(ContactResponse.model_fields)
+CONTACT_LIST_ADAPTER = TypeAdapter(list[ContactResponse])
+CONTACTS_CHANGED = "contacts_changed"
+# Writes are only seen by the worker process that made them, so cached
+# results also expire after this many seconds.
+BIRTHDAYS_CACHE_TTL = 300
+SEARCH_RESULTS_LIMIT = 50
+
+# Bumped after every committed write to contacts; part of the birthdays cache key.
+_contacts_version = 0
+_upcoming_birthdays_cache: dict[tuple[int, int], tuple[float, bytes]] = {}
+
+
+def _mark_contacts_changed(db: AsyncSession) -> None:
+    """Flag the session so cached reads are invalidated once it commits.
+
+    Write routes use the function-scoped ``get_tx`` dependency, which
+    commits before the response is sent, so the cache is already cleared
+    when the client receives the write response.
+    """
+    db.info[CONTACTS_CHANGED] = True
 
 
-def _is_birthday_within_days(
-        birthday: date | None, current_date: date, days: int
-) -> bool:
-    """Check if a birthday falls within the specified number of days from current date.
+@event.listens_for(RaiseloadSession, "after_commit")
+def _invalidate_contacts_cache(session) -> None:
+    global _contacts_version
+    if session.info.pop(CONTACTS_CHANGED, False):
+        _contacts_version += 1
+        _upcoming_birthdays_cache.clear()
+
+
+def _upcoming_birthday_keys(current_date: date, days: int) -> list[int]:
+    """Build the ``MMDD`` keys for every day from current date to ``days`` ahead.
+
+    In non-leap years February 28 also matches February 29 birthdays, so
+    those contacts are not skipped.
 
-    :param birthday: The birthday date to check
     :param current_date: Reference date (typically today)
     :param days: Number of days to look ahead
-    :return: True if birthday is within the specified range, False otherwise
-    :rtype: bool
+    :return: ``MMDD`` integers matching ``models.birthday_mmdd``
+    :rtype: list[int]
+    """
+    keys = []
+    for offset in range(days + 1):
+        day = current_date + timedelta(days=offset)
+        keys.append(day.month * 100 + day.day)
+        if (day.month, day.day) == (2, 28) and not isleap(day.year):
+            keys.append(229)
+    return keys
+
+
+def _trusted_response(contact: Contact) -> ContactResponse:
+    """Wrap a stored contact in ``ContactResponse`` without re-validating it.
+
+    Rows were validated when they were written, so running ``EmailStr``
+    and length checks again on every read is wasted work.
+
+    :param contact: Contact loaded from the database
+    :return: Response model built from the contact's attributes
+    :rtype: ContactResponse
+    """
+    return ContactResponse.model_construct(
+        **{field: getattr(contact, field) for field in RESPONSE_FIELDS}
+    )
+
+
+def _contact_json_response(
+        contact: Contact, status_code: int = status.HTTP_200_OK
+) -> Response:
+    """Build a JSON response of one stored contact, bypassing ``response_model``."""
+    return Response(
+        content=_trusted_response(contact).model_dump_json(),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+def _serialize_contacts(contacts: list[Contact]) -> bytes:
+    """Serialize stored contacts to a JSON array without re-validating them.
+
+    pydantic-core writes the JSON bytes directly, skipping the intermediate
+    dicts and the stdlib ``json`` encoder.
+    """
+    return CONTACT_LIST_ADAPTER.dump_json(
+        [_trusted_response(contact) for contact in contacts]
+    )
+
+
+def _contacts_json_response(contacts: list[Contact]) -> Response:
+    """Build a JSON response of stored contacts, bypassing ``response_model``."""
+    return Response(
+        content=_serialize_contacts(contacts), media_type="application/json"
+    )
+
+
+def _contacts_page_statement(after_id: int, limit: int) -> Select:
+    """Build the keyset-paginated contacts list statement."""
+    return (
+        select(Contact).where(Contact.id > after_id).order_by(Contact.id).limit(limit)
+    )
+
+
+def _contacts_page_bounds_statement(after_id: int, limit: int) -> Select:
+    """Build the statement counting a page and finding its last ID.
+
+    Only the primary key index is read, so the cursor is known before
+    the page itself is streamed.
+    """
+    page_ids = (
+        _contacts_page_statement(after_id, limit)
+        .with_only_columns(Contact.id)
+        .subquery()
+    )
+    return select(func.count(), func.max(page_ids.c.id))
+
+
+def _search_statement(query: str) -> Select:
+    """Build the fuzzy search statement, best matches first.
+
+    ``search_text %> query`` keeps rows where ``query`` is similar to some
+    word of the name or email (``pg_trgm.word_similarity_threshold``).
+    Substrings from the middle of a word can score below the threshold,
+    so a case-insensitive substring match is OR'd in as well. The trigram
+    GIN index serves both predicates.
+    """
+    similarity = func.word_similarity(query, search_text)
+    return (
+        select(Contact)
+        .where(
+            or_(
+                search_text.self_group().op("%>", is_comparison=True)(query),
+                search_text.ilike(f"%{query}%"),
+            )
+        )
+        .order_by(similarity.desc(), Contact.id)
+        .limit(SEARCH_RESULTS_LIMIT)
+    )
+
+
+def _prefix_search_statement(query: str) -> Select:
+    """Build the case-insensitive prefix search statement.
+
+    Matches against the generated ``*_lower`` columns, whose
+    ``text_pattern_ops`` B-tree indexes serve ``LIKE 'prefix%'``.
     """
-    if birthday is None:
-        return False
+    # Backslash is PostgreSQL's default LIKE escape character.
+    escaped = query.lower().replace("\\", "\\\\")
+    escaped = escaped.replace("%", "\\%").replace("_", "\\_")
+    pattern = f"{escaped}%"
+    return (
+        select(Contact)
+        .where(
+            or_(
+                Contact.first_name_lower.like(pattern),
+                Contact.last_name_lower.like(pattern),
+                Contact.email_lower.like(pattern),
+            )
+        )
+        .order_by(Contact.id)
+        .limit(SEARCH_RESULTS_LIMIT)
+    )
+
+
+def _create_contact_statement(data: dict) -> Insert:
+    """Build the insert that skips duplicate emails and returns the new row."""
+    return (
+        insert(Contact)
+        .values(**data)
+        .on_conflict_do_nothing(index_elements=[Contact.email])
+        .returning(Contact)
+    )
+
+
+def _update_contact_statement(contact_id: int, data: dict) -> Update:
+    """Build the update of the given fields returning the updated row."""
+    return (
+        update(Contact)
+        .where(Contact.id == contact_id)
+        .values(**data)
+        .returning(Contact)
+    )
+
+
+def _delete_contact_statement(contact_id: int) -> Delete:
+    """Build the delete returning the removed contact's ID."""
+    return delete(Contact).where(Contact.id == contact_id).returning(Contact.id)
+
 
-    end_date = current_date + timedelta(days=days)
-    birthday_this_year = birthday.replace(year=current_date.year)
+def _upcoming_birthdays_statement(current_date: date, days: int) -> Select:
+    """Build the statement selecting birthdays within ``days`` of current date."""
+    upcoming_keys = _upcoming_birthday_keys(current_date, days)
+    return select(Contact).where(birthday_mmdd.in_(upcoming_keys))
 
-    if birthday_this_year < current_date:
-        birthday_this_year = birthday_this_year.replace(year=current_date.year + 1)
 
-    return current_date <= birthday_this_year <= end_date
+async def _stream_contacts(
+        db: AsyncSession, statement: Select
+) -> AsyncIterator[str]:
+    """Yield contacts as newline-delimited JSON, fetched in batches.
+
+    The body is streamed with the request's own session: since FastAPI
+    0.121 a request-scoped yield dependency stays open until the response
+    has been sent, so no second connection is needed.
+
+    :param db: Request database session
+    :param statement: Contacts select to run on a server-side cursor
+    :return: One serialized ``ContactResponse`` per line
+    :rtype: AsyncIterator[str]
+    """
+    contacts = await db.stream_scalars(
+        statement.execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    async for contact in contacts:
+        yield _trusted_response(contact).model_dump_json() + "\n"
+
+
+async def _warm_statement_cache() -> None:
+    """Run each query shape once so the first real request is a cache hit.
+
+    SQLAlchemy caches compiled SQL by statement structure, not by bound
+    values, so dummy arguments warm the same entries the routes use. The
+    write statements run in a transaction that is rolled back; updates
+    are warmed for a full ``ContactBase`` body, other field subsets
+    compile on first use.
+    """
+    warmup_contact = ContactBase.model_construct(
+        first_name="warmup",
+        last_name="warmup",
+        email="warmup@warmup.invalid",
+        phone="0000000000",
+        birthday=date.today(),
+        additional_data=None,
+    ).model_dump()
+    try:
+        async with Session() as db:
+            await db.get(Contact, 0)
+            await db.execute(_contacts_page_bounds_statement(after_id=0, limit=1))
+            await db.scalars(_contacts_page_statement(after_id=0, limit=1))
+            await db.scalars(_search_statement("warmup"))
+            await db.scalars(_prefix_search_statement("warmup"))
+            await db.scalars(_upcoming_birthdays_statement(date.today(), days=7))
+            await db.scalar(_create_contact_statement(warmup_contact))
+            await db.scalar(_update_contact_statement(0, warmup_contact))
+            await db.scalar(_delete_contact_statement(0))
+            await db.rollback()
+    except (OSError, SQLAlchemyError) as exc:
+        logger.warning("Skipping statement cache warmup: %s", exc)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the compiled statement cache on startup, release the pool on shutdown."""
+    await _warm_statement_cache()
+    yield
+    await engine.dispose()
+
+
+app = FastAPI(
+    title="ContactHub API",
+    description="REST API for managing personal and business contacts with search and birthday tracking",
+    version="1.0.0",
+    lifespan=lifespan,
+)
 
 
 @app.post(
@@ -52,7 +310,10 @@ def _is_birthday_within_days(
     summary="Create a new contact",
     description="Add a new contact to the database. Email must be unique.",
 )
-def create_contact(contact: ContactBase, db: Session = Depends(get_db)):
+async def create_contact(
+        contact: ContactBase,
+        db: AsyncSession = Depends(get_tx, scope="function"),
+):
     """Create a new contact entry in the database.
 
     :param contact: Contact data to create
@@ -61,44 +322,78 @@ def create_contact(contact: ContactBase, db: Session = Depends(get_db)):
     :rtype: ContactResponse
     :raises HTTPException: If email is already registered (status 400)
     """
-    existing_contact = db.query(Contact).filter(Contact.email == contact.email).first()
-    if existing_contact:
+    # The uniqueness check and the insert are one statement: a duplicate
+    # email inserts nothing and returns no row.
+    new_contact = await db.scalar(_create_contact_statement(contact.model_dump()))
+    if new_contact is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Contact with email {contact.email} already exists",
         )
-
-    new_contact = Contact(**contact.model_dump())
-    db.add(new_contact)
-    db.commit()
-    db.refresh(new_contact)
-    return new_contact
+    _mark_contacts_changed(db)
+    return _contact_json_response(new_contact, status.HTTP_201_CREATED)
 
 
 @app.get(
     "/contacts/",
-    response_model=list[ContactResponse],
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Newline-delimited JSON, one contact per line",
+            "content": {"application/x-ndjson": {}},
+            "headers": {
+                "X-Next-Cursor": {
+                    "description": "Pass as after_id to fetch the next page; "
+                    "absent on the last page",
+                    "schema": {"type": "integer"},
+                }
+            },
+        }
+    },
     tags=["Contacts"],
     summary="Retrieve all contacts",
-    description="Get a paginated list of all contacts in the database",
+    description="Stream a paginated list of all contacts in the database as NDJSON",
 )
-def get_contacts_list(
-        skip: int = Query(0, ge=0, description="Number of records to skip"),
+async def get_contacts_list(
+        after_id: int = Query(
+            0, ge=0, description="Return contacts with ID greater than this cursor"
+        ),
         limit: int = Query(
             100, ge=1, le=500, description="Maximum number of records to return"
         ),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
 ):
-    """Retrieve a list of contacts with pagination support.
+    """Stream a list of contacts ordered by ID with keyset pagination.
 
-    :param skip: Number of records to skip (for pagination)
+    Pages are located by seeking the primary key past ``after_id``, so
+    deep pages cost the same as the first one. Rows are read from a
+    server-side cursor in batches and written to the client as they
+    arrive, so memory does not grow with ``limit``.
+
+    The page bounds (for the ``X-Next-Cursor`` header) and the streamed
+    rows are read on one connection in a single REPEATABLE READ
+    transaction, so both see the same snapshot.
+
+    :param after_id: ID of the last contact on the previous page
     :param limit: Maximum number of records to return
     :param db: Database session
-    :return: List of contacts
-    :rtype: list[ContactResponse]
+    :return: Streaming NDJSON response of contacts
+    :rtype: StreamingResponse
     """
-    contacts = db.query(Contact).offset(skip).limit(limit).all()
-    return contacts
+    await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    page_size, last_id = (
+        await db.execute(_contacts_page_bounds_statement(after_id, limit))
+    ).one()
+
+    headers = {}
+    if page_size == limit:
+        headers["X-Next-Cursor"] = str(last_id)
+
+    return StreamingResponse(
+        _stream_contacts(db, _contacts_page_statement(after_id, limit)),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
 
 
 @app.get(
@@ -108,37 +403,38 @@ def get_contacts_list(
     summary="Search contacts",
     description="Search contacts by first name, last name, or email address",
 )
-def search_contacts_by_query(
+async def search_contacts_by_query(
         query: str = Query(
             ...,
             min_length=3,
             description="Search query - minimum 3 characters (searches in name, surname, email)",
         ),
-        db: Session = Depends(get_db),
+        prefix: bool = Query(
+            False, description="Only match names or emails starting with the query"
+        ),
+        db: AsyncSession = Depends(get_db),
 ):
     """Search for contacts matching the provided query string.
 
-    The search is case-insensitive and looks for matches in:
+    The search is case-insensitive and matches any substring as well as
+    words similar to the query (tolerating typos), returning up to
+    ``SEARCH_RESULTS_LIMIT`` best matches ranked by similarity. It looks in:
     - First name
     - Last name
     - Email address
 
+    With ``prefix`` set, only exact case-insensitive prefixes match, which
+    is answered from plain B-tree indexes and skips similarity ranking.
+
     :param query: Search string (minimum 3 characters)
+    :param prefix: Match only values starting with the query
     :param db: Database session
     :return: List of matching contacts
     :rtype: list[ContactResponse]
     :raises HTTPException: If no contacts match the query (status 404)
     """
-    search_pattern = f"%{query}%"
-    matching_contacts = (
-        db.query(Contact)
-        .filter(
-            (Contact.first_name.ilike(search_pattern))
-            | (Contact.last_name.ilike(search_pattern))
-            | (Contact.email.ilike(search_pattern))
-        )
-        .all()
-    )
+    statement = _prefix_search_statement(query) if prefix else _search_statement(query)
+    matching_contacts = (await db.scalars(statement)).all()
 
     if not matching_contacts:
         raise HTTPException(
@@ -146,7 +442,7 @@ def search_contacts_by_query(
             detail=f"No contacts found matching '{query}'",
         )
 
-    return matching_contacts
+    return _contacts_json_response(matching_contacts)
 
 
 @app.get(
@@ -156,27 +452,39 @@ def search_contacts_by_query(
     summary="Get upcoming birthdays",
     description="Retrieve contacts with birthdays in the next 7 days",
 )
-def get_upcoming_birthdays(db: Session = Depends(get_db)):
+async def get_upcoming_birthdays(db: AsyncSession = Depends(get_db)):
     """Retrieve contacts who have birthdays coming up in the next 7 days.
 
-    This endpoint checks all contacts and returns those whose birthday
-    falls within the next week, accounting for year transitions.
+    The month/day window is matched in the database, so only contacts whose
+    birthday falls within the next week are loaded, accounting for year
+    transitions. The serialized result is cached per day for up to
+    ``BIRTHDAYS_CACHE_TTL`` seconds and dropped as soon as this process
+    commits any contact change.
 
     :param db: Database session
     :return: List of contacts with upcoming birthdays
     :rtype: List[ContactResponse]
     """
     current_date = date.today()
-    days_to_check = 7
-
-    contacts = db.query(Contact).all()
-    contacts_with_upcoming_birthdays = [
-        contact
-        for contact in contacts
-        if _is_birthday_within_days(contact.birthday, current_date, days_to_check)
-    ]
+    # Read the version before querying, so a write committed meanwhile
+    # leaves this result under a key that is already stale.
+    cache_key = (current_date.toordinal(), _contacts_version)
+
+    cached = _upcoming_birthdays_cache.get(cache_key)
+    if cached is not None and cached[0] > time.monotonic():
+        body = cached[1]
+    else:
+        contacts_with_upcoming_birthdays = await db.scalars(
+            _upcoming_birthdays_statement(current_date, days=7)
+        )
+        body = _serialize_contacts(contacts_with_upcoming_birthdays.all())
+        _upcoming_birthdays_cache.clear()
+        _upcoming_birthdays_cache[cache_key] = (
+            time.monotonic() + BIRTHDAYS_CACHE_TTL,
+            body,
+        )
 
-    return contacts_with_upcoming_birthdays
+    return Response(content=body, media_type="application/json")
 
 
 @app.get(
@@ -186,7 +494,7 @@ def get_upcoming_birthdays(db: Session = Depends(get_db)):
     summary="Get contact by ID",
     description="Retrieve a specific contact by their unique identifier",
 )
-def get_contact_by_id(contact_id: int, db: Session = Depends(get_db)):
+async def get_contact_by_id(contact_id: int, db: AsyncSession = Depends(get_db)):
     """Retrieve a single contact by ID.
 
     :param contact_id: The unique identifier of the contact
@@ -195,7 +503,7 @@ def get_contact_by_id(contact_id: int, db: Session = Depends(get_db)):
     :rtype: ContactResponse
     :raises HTTPException: If contact with given ID doesn't exist (status 404)
     """
-    contact = db.query(Contact).filter(Contact.id == contact_id).first()
+    contact = await db.get(Contact, contact_id)
     if contact is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -211,8 +519,10 @@ def get_contact_by_id(contact_id: int, db: Session = Depends(get_db)):
     summary="Update contact",
     description="Update an existing contact's information",
 )
-def update_contact_by_id(
-        contact_id: int, contact: ContactUpdate, db: Session = Depends(get_db)
+async def update_contact_by_id(
+        contact_id: int,
+        contact: ContactUpdate,
+        db: AsyncSession = Depends(get_tx, scope="function"),
 ):
     """Update an existing contact's information.
 
@@ -225,20 +535,23 @@ def update_contact_by_id(
     :rtype: ContactResponse
     :raises HTTPException: If contact with given ID doesn't exist (status 404)
     """
-    existing_contact = db.query(Contact).filter(Contact.id == contact_id).first()
-    if existing_contact is None:
+    update_data = contact.model_dump(exclude_unset=True)
+    if update_data:
+        updated_contact = await db.scalar(
+            _update_contact_statement(contact_id, update_data)
+        )
+    else:
+        updated_contact = await db.get(Contact, contact_id)
+
+    if updated_contact is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Contact with ID {contact_id} not found",
         )
 
-    update_data = contact.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(existing_contact, field, value)
-
-    db.commit()
-    db.refresh(existing_contact)
-    return existing_contact
+    if update_data:
+        _mark_contacts_changed(db)
+    return updated_contact
 
 
 @app.delete(
@@ -248,7 +561,9 @@ def update_contact_by_id(
     summary="Delete contact",
     description="Remove a contact from the database",
 )
-def delete_contact_by_id(contact_id: int, db: Session = Depends(get_db)):
+async def delete_contact_by_id(
+        contact_id: int, db: AsyncSession = Depends(get_tx, scope="function")
+):
     """Delete a contact from the database.
 
     :param contact_id: The unique identifier of the contact to delete
@@ -257,15 +572,14 @@ def delete_contact_by_id(contact_id: int, db: Session = Depends(get_db)):
     :rtype: None
     :raises HTTPException: If contact with given ID doesn't exist (status 404)
     """
-    contact = db.query(Contact).filter(Contact.id == contact_id).first()
-    if contact is None:
+    deleted_id = await db.scalar(_delete_contact_statement(contact_id))
+    if deleted_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Contact with ID {contact_id} not found",
         )
 
-    db.delete(contact)
-    db.commit()
+    _mark_contacts_changed(db)
     return None
 
 
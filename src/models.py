@@ -2,7 +2,15 @@
 
 from datetime import datetime, date, timezone
 
-from sqlalchemy import text, Date, DateTime
+from sqlalchemy import (
+    text,
+    Computed,
+    Date,
+    DateTime,
+    Index,
+    extract,
+    literal_column,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -14,14 +22,39 @@ class Contact(Base):
     """ORM model for a contact in the address book"""
 
     __tablename__ = "contacts"
+    __table_args__ = (
+        Index(
+            "ix_contacts_first_name_lower",
+            "first_name_lower",
+            postgresql_ops={"first_name_lower": "text_pattern_ops"},
+        ),
+        Index(
+            "ix_contacts_last_name_lower",
+            "last_name_lower",
+            postgresql_ops={"last_name_lower": "text_pattern_ops"},
+        ),
+        Index(
+            "ix_contacts_email_lower",
+            "email_lower",
+            postgresql_ops={"email_lower": "text_pattern_ops"},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    first_name: Mapped[str] = mapped_column(nullable=False, index=True)
-    last_name: Mapped[str] = mapped_column(nullable=False, index=True)
+    first_name: Mapped[str] = mapped_column(nullable=False)
+    last_name: Mapped[str] = mapped_column(nullable=False)
     email: Mapped[str] = mapped_column(unique=True, nullable=False, index=True)
     phone: Mapped[str | None] = mapped_column(nullable=False, index=True)
     birthday: Mapped[date | None] = mapped_column(Date, nullable=False, index=True)
     additional_data: Mapped[str | None] = mapped_column(nullable=True)
+    # Lowercased copies maintained by PostgreSQL for indexed prefix search.
+    first_name_lower: Mapped[str] = mapped_column(
+        Computed("lower(first_name)", persisted=True)
+    )
+    last_name_lower: Mapped[str] = mapped_column(
+        Computed("lower(last_name)", persisted=True)
+    )
+    email_lower: Mapped[str] = mapped_column(Computed("lower(email)", persisted=True))
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=text("TIMEZONE('utc', now())"),
@@ -37,3 +70,30 @@ class Contact(Base):
 
     def __repr__(self):
         return f"<Contact(id={self.id}, name={self.first_name} {self.last_name} email={self.email})>"
+
+
+# Birthday as an ``MMDD`` integer (e.g. 1231). The index below lets upcoming
+# birthday lookups ignore the year without scanning the whole table; queries
+# must use this exact expression for the planner to pick the index up.
+birthday_mmdd = extract("day", Contact.birthday) + extract(
+    "month", Contact.birthday
+) * literal_column("100")
+
+Index("ix_contacts_birthday_mmdd", birthday_mmdd)
+
+# Name and email joined into one searchable string, so a substring search
+# is a single predicate served by one trigram index instead of three.
+search_text = (
+    Contact.first_name
+    + literal_column("' '")
+    + Contact.last_name
+    + literal_column("' '")
+    + Contact.email
+)
+
+Index(
+    "ix_contacts_search_trgm",
+    search_text.label("search_text"),
+    postgresql_using="gin",
+    postgresql_ops={"search_text": "gin_trgm_ops"},
+)
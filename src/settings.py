@@ -7,6 +7,14 @@ class Settings(BaseSettings):
     postgres_db: str
     postgres_host: str = "localhost"
     postgres_port: int = 5432
+    sql_echo: bool = False
+    slow_query_ms: float = 200.0
+    db_pool_size: int = 20
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 5.0
+    db_pool_recycle: int = 1800
+    query_cache_size: int = 1200
+    search_similarity_threshold: float = 0.3
 
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", case_sensitive=False, extra="ignore"
@@ -16,5 +24,9 @@ class Settings(BaseSettings):
     def database_url(self) -> str:
         return f"postgresql+psycopg2://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
 
+    @property
+    def async_database_url(self) -> str:
+        return self.database_url.replace("postgresql+psycopg2://", "postgresql+asyncpg://")
+
 
 settings = Settings()